@@ -22,6 +22,11 @@ import sys
 # Import Loom trace library (installed in container)
 from loom_trace import tracer, trace_span
 
+# Optional: precompile the JSON layout of frequent fixed-shape spans
+# (applies to matching trace_span() calls below)
+tracer.precompile_span("query_database", ("query_type", "query"))
+tracer.precompile_span("process_results", ("result_count",))
+
 
 def query_database(query):
     """Simulate database query with tracing."""
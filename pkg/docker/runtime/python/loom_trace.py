@@ -21,7 +21,8 @@ Usage:
         raise
 
 Environment Variables:
-    LOOM_TRACE_ID: Trace ID from host (inherited from parent)
+    LOOM_TRACE_ID: Trace ID from host (inherited from parent). If unset,
+        the host is not collecting traces and tracer is a no-op NoopTracer.
     LOOM_SPAN_ID: Parent span ID (the docker.execute span)
     LOOM_TRACE_BAGGAGE: W3C baggage format (tenant_id=foo,org_id=bar)
 
@@ -29,22 +30,208 @@ Output Format:
     Spans are written to stderr with prefix:
     __LOOM_TRACE__:{"trace_id":"...","span_id":"...","name":"..."}
 
+    Finished spans are buffered and written in batches when the outermost
+    span ends, when MAX_EXPORT_BATCH_SIZE spans are pending, or when the
+    oldest pending span is SCHEDULE_DELAY seconds old. Writes happen on
+    the thread calling end_span(), never in the background, so trace lines
+    can't land in the middle of a partial application line. Call
+    tracer.flush() to force pending spans out; this also happens
+    automatically at interpreter exit, but not on os._exit().
+
 Security:
     - No direct Hawk access (all traces proxied through host)
     - Baggage values sanitized to prevent injection
     - Trace data redacted by host before export
 """
 
+import atexit
+import collections
 import os
 import json
+import select
 import sys
-import uuid
-from dataclasses import dataclass, asdict, field
-from datetime import datetime
+import threading
+import time
+from json.encoder import encode_basestring_ascii as _encode_str
 from typing import Dict, Any, Optional
 
 
-@dataclass
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+# orjson is optional: ~5x faster than json and encodes straight to bytes
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    _orjson_dumps = orjson.dumps
+
+    def _dumps(obj: Any) -> bytes:
+        try:
+            return _orjson_dumps(obj)
+        except TypeError:
+            # orjson rejects input json accepts (non-str dict keys, ints
+            # wider than 64 bits); keep output independent of orjson
+            return _json_dumps(obj)
+
+else:
+    _dumps = _json_dumps
+
+
+def _encode_value(value: Any) -> str:
+    """JSON-encode a single value (used by precompiled span templates)."""
+    if type(value) is str:
+        return _encode_str(value)
+    return json.dumps(value, separators=(",", ":"))
+
+
+# Span IDs are opaque, so draw raw random bytes instead of building UUIDs
+# (16 bytes / 32 hex chars for trace IDs, 8 bytes / 16 hex chars for spans)
+_rand = os.urandom
+
+# Number of recently started spans kept on LoomTracer.spans for debugging
+MAX_RECENT_SPANS = 128
+
+# Maximum number of finished spans buffered before they are written
+MAX_EXPORT_BATCH_SIZE = 64
+
+# Maximum time (seconds) a finished span is buffered before export
+SCHEDULE_DELAY = 0.2
+
+# Maximum bytes per stderr write. Pipe writes up to PIPE_BUF bytes are
+# atomic, so lines from concurrent writers (threads, forked workers,
+# subprocesses) sharing the container's stderr never interleave.
+_PIPE_BUF = getattr(select, "PIPE_BUF", 512)
+
+# Line prefixes read by the host TraceCollector (pre-encoded for the writer)
+_TRACE_PREFIX = b"__LOOM_TRACE__:"
+_NEWLINE = b"\n"
+
+# Hot-path functions bound once at import to skip module attribute lookups
+_time = time.time
+_gmtime = time.gmtime
+_monotonic = time.monotonic
+
+# (epoch second, "YYYY-MM-DDTHH:MM:SS") of the last formatted timestamp
+_iso_second_cache = (-1, "")
+
+
+def _now_iso() -> str:
+    """
+    Return the current UTC time as an ISO 8601 string with microseconds.
+
+    Same output as datetime.utcnow().isoformat() plus a "Z" suffix, but the
+    date/time prefix is formatted at most once per second.
+    """
+    global _iso_second_cache
+    t = _time()
+    sec = int(t)
+    cached_sec, prefix = _iso_second_cache
+    if sec != cached_sec:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", _gmtime(sec))
+        _iso_second_cache = (sec, prefix)
+    return f"{prefix}.{int((t - sec) * 1_000_000):06d}Z"
+
+
+# Encoded trace lines of finished spans not yet written to stderr. Shared by
+# every tracer in the process and guarded by _pending_lock.
+_pending = []
+_pending_since = 0.0
+_pending_lock = threading.Lock()
+
+# Per-thread number of open spans; a thread's batch is written as soon as
+# its outermost span ends
+_local = threading.local()
+
+
+def _export_line(line: bytes, outermost: bool):
+    """Buffer an encoded trace line, writing the batch once it is due."""
+    global _pending_since
+    with _pending_lock:
+        if not _pending:
+            _pending_since = _monotonic()
+        _pending.append(line)
+        if (
+            outermost
+            or len(_pending) >= MAX_EXPORT_BATCH_SIZE
+            or _monotonic() - _pending_since >= SCHEDULE_DELAY
+        ):
+            _write_lines(_pending)
+            _pending.clear()
+
+
+def _flush_pending():
+    """Write all buffered trace lines to stderr."""
+    with _pending_lock:
+        if _pending:
+            _write_lines(_pending)
+            _pending.clear()
+
+
+def _write_lines(lines):
+    """
+    Write encoded trace lines to stderr for host collection.
+
+    Lines are joined into as few writes as possible, each at most _PIPE_BUF
+    bytes and made of whole lines, so every write is atomic and carries
+    complete __LOOM_TRACE__ records. A single line longer than _PIPE_BUF is
+    written on its own.
+    """
+    try:
+        # Flush pending text first so trace lines don't jump ahead of
+        # application output, then bypass the text-encoding layer
+        sys.stderr.flush()
+        buffer = getattr(sys.stderr, "buffer", None)
+        chunk = []
+        size = 0
+        for line in lines:
+            if chunk and size + len(line) > _PIPE_BUF:
+                _write_chunk(buffer, b"".join(chunk))
+                chunk.clear()
+                size = 0
+            chunk.append(line)
+            size += len(line)
+        if chunk:
+            _write_chunk(buffer, b"".join(chunk))
+    except Exception:
+        # Don't fail application if trace export fails
+        pass
+
+
+def _write_chunk(buffer, data: bytes):
+    """Write one chunk of trace lines and flush it to the host."""
+    if buffer is not None:
+        buffer.write(data)
+        buffer.flush()
+    else:
+        sys.stderr.write(data.decode("utf-8"))
+        sys.stderr.flush()
+
+
+def _after_fork_in_child():
+    """
+    Reset export state in a forked child process.
+
+    Lines buffered before the fork belong to the parent, which writes them
+    itself, and the child's first span ending is its outermost one.
+    """
+    global _pending, _pending_lock, _local
+    _pending = []
+    _pending_lock = threading.Lock()
+    _local = threading.local()
+
+
+# Buffered spans are written at interpreter exit. Forked multiprocessing
+# workers skip atexit, but their task spans are outermost in the worker and
+# so are written as soon as they end.
+atexit.register(_flush_pending)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
 class Span:
     """
     Represents a single span in a distributed trace.
@@ -60,18 +247,58 @@ class Span:
         status: Span status - "ok", "error", or "unset"
     """
 
-    trace_id: str
-    span_id: str
-    parent_id: str
-    name: str
-    start_time: str
-    end_time: Optional[str] = None
-    attributes: Dict[str, Any] = field(default_factory=dict)
-    status: str = "unset"
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "start_time",
+        "end_time",
+        "attributes",
+        "status",
+    )
+
+    def __init__(
+        self,
+        trace_id: str,
+        span_id: str,
+        parent_id: str,
+        name: str,
+        start_time: str,
+        end_time: Optional[str] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        status: str = "unset",
+    ):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start_time = start_time
+        self.end_time = end_time
+        self.attributes = {} if attributes is None else attributes
+        self.status = status
+
+    def __repr__(self) -> str:
+        return f"Span(name={self.name!r}, span_id={self.span_id!r}, status={self.status!r})"
+
+    def to_json_bytes(self) -> bytes:
+        """Serialize span to UTF-8 encoded JSON for export."""
+        return _dumps(
+            {
+                "trace_id": self.trace_id,
+                "span_id": self.span_id,
+                "parent_id": self.parent_id,
+                "name": self.name,
+                "start_time": self.start_time,
+                "end_time": self.end_time,
+                "attributes": self.attributes,
+                "status": self.status,
+            }
+        )
 
     def to_json(self) -> str:
         """Serialize span to JSON for export."""
-        return json.dumps(asdict(self))
+        return self.to_json_bytes().decode("utf-8")
 
 
 class LoomTracer:
@@ -83,14 +310,16 @@ class LoomTracer:
     collection by the host.
 
     Thread Safety:
-        This tracer is NOT thread-safe. If using multiple threads,
-        create a separate tracer instance per thread or use locks.
+        Safe to use from multiple threads. Spans are serialized by the
+        thread that ends them; the shared export buffer and stderr writes
+        are guarded by a single module-level lock.
     """
 
     def __init__(self):
         # Read trace context from environment
-        self.trace_id = os.environ.get("LOOM_TRACE_ID", str(uuid.uuid4()))
+        self.trace_id = os.environ.get("LOOM_TRACE_ID") or _rand(16).hex()
         self.parent_span_id = os.environ.get("LOOM_SPAN_ID", "")
+        self._parent_id = self.parent_span_id or self.trace_id
 
         # Parse W3C baggage (format: key1=val1,key2=val2)
         self.baggage = self._parse_baggage(os.environ.get("LOOM_TRACE_BAGGAGE", ""))
@@ -99,8 +328,36 @@ class LoomTracer:
         self.tenant_id = self.baggage.get("tenant_id", "")
         self.org_id = self.baggage.get("org_id", "")
 
-        # Track spans for debugging (not used for export)
-        self.spans = []
+        # Tenant attributes are constant for the tracer's lifetime, so build
+        # them once instead of on every start_span()
+        base_attrs = {}
+        if self.tenant_id:
+            base_attrs["tenant_id"] = self.tenant_id
+        if self.org_id:
+            base_attrs["org_id"] = self.org_id
+        self._base_attrs = base_attrs
+        self._base_attr_items = tuple(base_attrs.items())
+
+        # Track recent spans for debugging (not used for export). Bounded
+        # ring buffer so long-lived containers don't grow without limit;
+        # only the last MAX_RECENT_SPANS started spans are retained.
+        self.spans = collections.deque(maxlen=MAX_RECENT_SPANS)
+
+        # Precompiled span layouts (see precompile_span): name -> attribute keys
+        self._span_layouts: Dict[str, tuple] = {}
+
+        # Compiled templates for precompiled layouts
+        self._span_templates: Dict[str, tuple] = {}
+
+        # trace_id/parent_id are identical for every span from this tracer,
+        # so encode that JSON fragment once and splice it into each span
+        self._id_prefix = (
+            b'{"trace_id":'
+            + _dumps(self.trace_id)
+            + b',"parent_id":'
+            + _dumps(self._parent_id)
+            + b","
+        )
 
     def _parse_baggage(self, baggage_str: str) -> Dict[str, str]:
         """
@@ -116,18 +373,24 @@ class LoomTracer:
             Dictionary of key-value pairs
         """
         result = {}
-        if not baggage_str:
-            return result
-
-        for pair in baggage_str.split(","):
-            pair = pair.strip()
-            if "=" in pair:
-                key, val = pair.split("=", 1)
+        end = len(baggage_str)
+        start = 0
+
+        # Single pass over the string: only slice out key/value substrings,
+        # never the intermediate "key=val" pairs
+        while start < end:
+            comma = baggage_str.find(",", start)
+            if comma == -1:
+                comma = end
+            eq = baggage_str.find("=", start, comma)
+            if eq != -1:
                 # Sanitize to prevent injection attacks
-                key = key.strip()
-                val = val.strip()
-                if key and val:
-                    result[key] = val
+                key = baggage_str[start:eq].strip()
+                if key:
+                    val = baggage_str[eq + 1 : comma].strip()
+                    if val:
+                        result[key] = val
+            start = comma + 1
 
         return result
 
@@ -152,25 +415,27 @@ class LoomTracer:
                 raise
         """
         # Automatically include tenant context in all spans
-        if attributes is None:
-            attributes = {}
-
-        if self.tenant_id:
-            attributes["tenant_id"] = self.tenant_id
-        if self.org_id:
-            attributes["org_id"] = self.org_id
+        # (tenant fields take precedence over caller-supplied attributes).
+        # Without tenant context the caller's dict is used as-is.
+        if self._base_attr_items:
+            if attributes:
+                attributes = {**attributes, **self._base_attrs}
+            else:
+                attributes = dict(self._base_attr_items)
 
         span = Span(
             trace_id=self.trace_id,
-            span_id=str(uuid.uuid4()),
-            parent_id=self.parent_span_id or self.trace_id,
+            span_id=_rand(8).hex(),
+            parent_id=self._parent_id,
             name=name,
-            start_time=datetime.utcnow().isoformat() + "Z",
+            start_time=_now_iso(),
             attributes=attributes,
             status="unset",
         )
 
         self.spans.append(span)
+        local = _local
+        local.depth = getattr(local, "depth", 0) + 1
         return span
 
     def end_span(self, span: Span, status: str = "ok"):
@@ -182,29 +447,171 @@ class LoomTracer:
             status: "ok" (success), "error" (failure), or "unset" (unknown)
 
         Side Effects:
-            Writes span to stderr with __LOOM_TRACE__: prefix for host collection.
+            Serializes the span and buffers it for a batched write to stderr
+            with __LOOM_TRACE__: prefix for host collection.
         """
-        span.end_time = datetime.utcnow().isoformat() + "Z"
+        span.end_time = _now_iso()
         span.status = status
 
-        # Export span to stderr for host collection
-        # Format: __LOOM_TRACE__:{"trace_id":"...","span_id":"...",...}
         try:
-            print(f"__LOOM_TRACE__:{span.to_json()}", file=sys.stderr, flush=True)
+            line = _TRACE_PREFIX + self._span_json(span) + _NEWLINE
         except Exception as e:
-            # Don't fail application if trace export fails
-            # (but log to stderr for debugging)
-            print(f"__LOOM_TRACE_ERROR__: Failed to export span: {e}", file=sys.stderr)
+            line = f"__LOOM_TRACE_ERROR__: Failed to export span: {e}\n".encode("utf-8")
+
+        local = _local
+        depth = getattr(local, "depth", 1) - 1
+        local.depth = depth
+        _export_line(line, depth <= 0)
+
+    def precompile_span(self, name: str, attr_keys=()):
+        """
+        Precompile the JSON layout for spans with a fixed name and attributes.
+
+        Spans named name whose attributes are exactly attr_keys (in order,
+        plus tenant context) are serialized from a precomputed template
+        instead of the generic encoder. This applies to spans started any
+        way, including trace_span(). Only used without orjson, which is
+        already faster than the template path.
+
+        Args:
+            name: Span name
+            attr_keys: Attribute keys, in the order they are passed
+
+        Returns:
+            Function taking the attribute values (in attr_keys order) that
+            starts such a span; end it with end_span()
+
+        Example:
+            start_query = tracer.precompile_span("query_database", ("query_type", "query"))
+            span = start_query("SELECT", sql)
+            tracer.end_span(span, status="ok")
+        """
+        keys = tuple(attr_keys)
+        # Non-str keys are converted by json.dumps, so leave them to it
+        if orjson is None and all(type(k) is str for k in keys):
+            self._span_layouts[name] = keys + tuple(k for k in self._base_attrs if k not in keys)
+
+        def start(*values) -> Span:
+            return self.start_span(name, dict(zip(keys, values)))
+
+        return start
 
     def flush(self):
         """
         Flush any buffered spans.
 
-        Currently a no-op (spans exported immediately on end_span).
-        Provided for API compatibility and future buffering support.
+        Writes every finished span still buffered (by any tracer in this
+        process) to stderr before returning.
+        """
+        _flush_pending()
+
+    def _span_json(self, span: Span) -> bytes:
         """
+        Serialize a span, reusing the pre-encoded trace_id/parent_id fragment.
+
+        Falls back to Span.to_json_bytes() if the span's ids were changed
+        after start_span().
+        """
+        if span.trace_id is not self.trace_id or span.parent_id is not self._parent_id:
+            return span.to_json_bytes()
+
+        layout = self._span_layouts.get(span.name)
+        if layout is not None and tuple(span.attributes) == layout:
+            return self._span_json_template(span, layout)
+
+        data = {
+            "span_id": span.span_id,
+            "name": span.name,
+            "start_time": span.start_time,
+            "end_time": span.end_time,
+            "attributes": span.attributes,
+            "status": span.status,
+        }
+        # Drop the encoded dict's opening brace and splice in the id fragment
+        return self._id_prefix + memoryview(_dumps(data))[1:]
+
+    def _span_json_template(self, span: Span, layout: tuple) -> bytes:
+        """Serialize a span with a precompiled layout (see precompile_span)."""
+        compiled = self._span_templates.get(span.name)
+        if compiled is None or compiled[0] != layout:
+            # Everything but the per-span values is fixed for this layout;
+            # literal text is %-escaped so keys/names may contain "%"
+            attrs = ",".join(_encode_str(k).replace("%", "%%") + ":%s" for k in layout)
+            name = _encode_str(span.name).replace("%", "%%")
+            template = (
+                f'"span_id":%s,"name":{name},"start_time":%s,"end_time":%s,'
+                f'"attributes":{{{attrs}}},"status":%s}}'
+            )
+            compiled = self._span_templates[span.name] = (layout, template)
+
+        attributes = span.attributes
+        values = [
+            _encode_str(span.span_id),
+            _encode_str(span.start_time),
+            _encode_str(span.end_time),
+        ]
+        values.extend(_encode_value(attributes[k]) for k in layout)
+        values.append(_encode_value(span.status))
+        return self._id_prefix + (compiled[1] % tuple(values)).encode("ascii")
+
+
+class NoopTracer:
+    """
+    Tracer used when the host is not collecting traces (no LOOM_TRACE_ID).
+
+    Same interface as LoomTracer, but start_span() returns a shared
+    placeholder span and nothing is serialized or written to stderr.
+    trace_id is "" (no trace is being recorded); baggage and tenant
+    context are still read from the environment.
+    """
+
+    def __init__(self):
+        self.trace_id = ""
+        self.parent_span_id = os.environ.get("LOOM_SPAN_ID", "")
+        self.baggage = LoomTracer._parse_baggage(self, os.environ.get("LOOM_TRACE_BAGGAGE", ""))
+        self.tenant_id = self.baggage.get("tenant_id", "")
+        self.org_id = self.baggage.get("org_id", "")
+        self.spans = collections.deque(maxlen=MAX_RECENT_SPANS)
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> Span:
+        """Return the shared no-op span (its contents are discarded)."""
+        return _NOOP_SPAN
+
+    def end_span(self, span: Span, status: str = "ok"):
+        """Do nothing."""
+
+    def precompile_span(self, name: str, attr_keys=()):
+        """Return a start function for the no-op span."""
+        return lambda *values: _NOOP_SPAN
+
+    def flush(self):
+        """Do nothing."""
+
+
+class _DiscardDict(dict):
+    """Always-empty dict that silently discards writes."""
+
+    __slots__ = ()
+
+    def __setitem__(self, key, value):
         pass
 
+    def __ior__(self, other):
+        return self
+
+    def update(self, *args, **kwargs):
+        pass
+
+    def setdefault(self, key, default=None):
+        return default
+
+
+# Placeholder span shared by every NoopTracer.start_span() call. Its
+# attributes discard writes so callers can't leak state into it.
+_NOOP_SPAN = Span(
+    trace_id="", span_id="", parent_id="", name="noop", start_time="", attributes=_DiscardDict()
+)
+
 
 class trace_span:
     """
@@ -226,6 +633,9 @@ class trace_span:
             handle_error()
     """
 
+    # No per-instance __dict__: one small fixed-layout object per span
+    __slots__ = ("name", "attributes", "span")
+
     def __init__(self, name: str, **attributes):
         """
         Initialize context manager.
@@ -234,6 +644,8 @@ class trace_span:
             name: Span name
             **attributes: Span attributes as keyword arguments
         """
+        # The **attributes dict is freshly allocated per call, so it becomes
+        # the span's attributes without a copy
         self.name = name
         self.attributes = attributes
         self.span = None
@@ -251,8 +663,9 @@ class trace_span:
         return False
 
 
-# Global tracer instance (initialized with environment variables)
-tracer = LoomTracer()
+# Global tracer instance (initialized with environment variables).
+# Without a host trace context there is no collector, so skip tracing.
+tracer = LoomTracer() if os.environ.get("LOOM_TRACE_ID") else NoopTracer()
 
 
 # Convenience function for one-off spans
@@ -14,6 +14,10 @@
 package runtime
 
 import (
+	"os"
+	"os/exec"
+	"path/filepath"
+	goruntime "runtime"
 	"strings"
 	"testing"
 
@@ -46,6 +50,205 @@ func TestGetPythonTraceLibrary(t *testing.T) {
 	assert.Contains(t, lib, "import json", "Should import json module")
 }
 
+// precompiledSpanCheckScript compares the precompiled-template and generic span
+// serializers of loom_trace.py byte for byte.
+const precompiledSpanCheckScript = `
+import sys
+
+sys.modules["orjson"] = None  # templates are only used without orjson
+import loom_trace
+
+tracer = loom_trace.LoomTracer()
+cases = [
+    ("query_database", ("query_type", "query"), ("SELECT", 'q "x" % \u00e9\n')),
+    ("mixed", ("count", "ratio", "tags", "flag", "none"), (3, 2.5, {"a": [1, None], 2: "b"}, True, None)),
+    ("tenant_override", ("tenant_id", "k"), ("other", "v")),
+    ("pct%name", ("a%b", "%s"), ("100%", 1)),
+]
+for name, keys, values in cases:
+    span = tracer.precompile_span(name, keys)(*values)
+    span.end_time = loom_trace._now_iso()
+    span.status = "ok"
+    template = tracer._span_json(span)
+    layout = tracer._span_layouts.pop(name)
+    generic = tracer._span_json(span)
+    tracer._span_layouts[name] = layout
+    if name not in tracer._span_templates:
+        sys.exit("template path not used for %r" % name)
+    if template != generic:
+        sys.exit("mismatch for %r:\n%r\n%r" % (name, template, generic))
+print("OK")
+`
+
+// runPythonTraceScript runs script with python3 against the embedded
+// loom_trace.py and returns its stdout and stderr. The test is skipped if
+// python3 is not available.
+func runPythonTraceScript(t *testing.T, script string, env ...string) (string, string) {
+	t.Helper()
+
+	python, err := exec.LookPath("python3")
+	if err != nil {
+		t.Skip("python3 not available")
+	}
+
+	dir := t.TempDir()
+	require.NoError(t, os.WriteFile(filepath.Join(dir, "loom_trace.py"), []byte(GetPythonTraceLibrary()), 0o644))
+
+	var stdout, stderr strings.Builder
+	cmd := exec.Command(python, "-c", script)
+	cmd.Dir = dir
+	cmd.Env = append(os.Environ(), "PYTHONPATH="+dir)
+	cmd.Env = append(cmd.Env, env...)
+	cmd.Stdout = &stdout
+	cmd.Stderr = &stderr
+	require.NoError(t, cmd.Run(), "python script failed: %s%s", stdout.String(), stderr.String())
+	return stdout.String(), stderr.String()
+}
+
+// TestPythonTraceLibraryPrecompiledSpans tests that precompiled span templates
+// serialize exactly like the generic encoder (requires python3).
+func TestPythonTraceLibraryPrecompiledSpans(t *testing.T) {
+	out, _ := runPythonTraceScript(t, precompiledSpanCheckScript,
+		"LOOM_TRACE_ID=trace-123",
+		"LOOM_SPAN_ID=span-456",
+		"LOOM_TRACE_BAGGAGE=tenant_id=acme,org_id=org-1",
+	)
+	assert.Contains(t, out, "OK")
+}
+
+// traceLines returns the __LOOM_TRACE__ lines of stderr output, in order.
+func traceLines(stderr string) []string {
+	var lines []string
+	for _, line := range strings.Split(stderr, "\n") {
+		if strings.HasPrefix(line, "__LOOM_TRACE__:") {
+			lines = append(lines, line)
+		}
+	}
+	return lines
+}
+
+// TestPythonTraceLibraryExportsPendingSpansAtExit tests that spans still
+// buffered when the interpreter exits normally are written (requires python3).
+func TestPythonTraceLibraryExportsPendingSpansAtExit(t *testing.T) {
+	script := `
+from loom_trace import tracer
+
+outer = tracer.start_span("outer")
+for i in range(3):
+    tracer.end_span(tracer.start_span("inner", {"i": i}))
+`
+	_, stderr := runPythonTraceScript(t, script, "LOOM_TRACE_ID=trace-123")
+
+	lines := traceLines(stderr)
+	require.Len(t, lines, 3, "pending spans should be written at exit: %s", stderr)
+	for _, line := range lines {
+		assert.Contains(t, line, `"name":"inner"`)
+	}
+}
+
+// TestPythonTraceLibraryFlush tests that flush() writes buffered spans before
+// returning (requires python3).
+func TestPythonTraceLibraryFlush(t *testing.T) {
+	script := `
+import sys
+from loom_trace import tracer
+
+outer = tracer.start_span("outer")
+tracer.end_span(tracer.start_span("inner"))
+sys.stderr.write("before flush\n")
+tracer.flush()
+sys.stderr.write("after flush\n")
+`
+	_, stderr := runPythonTraceScript(t, script, "LOOM_TRACE_ID=trace-123")
+
+	before := strings.Index(stderr, "before flush\n")
+	span := strings.Index(stderr, `"name":"inner"`)
+	after := strings.Index(stderr, "after flush\n")
+	require.True(t, before >= 0 && span >= 0 && after >= 0, "unexpected stderr: %s", stderr)
+	assert.Less(t, before, span, "span should stay buffered until flush()")
+	assert.Less(t, span, after, "flush() should write the span before returning")
+}
+
+// TestPythonTraceLibraryForkedPoolWorkers tests that spans ended in forked
+// multiprocessing.Pool workers, which exit without running atexit, are
+// exported (requires python3).
+func TestPythonTraceLibraryForkedPoolWorkers(t *testing.T) {
+	if goruntime.GOOS == "windows" {
+		t.Skip("fork start method not available on windows")
+	}
+
+	script := `
+import multiprocessing
+from loom_trace import trace_span
+
+def work(i):
+    with trace_span("work", i=i):
+        return i
+
+with trace_span("main"):
+    with multiprocessing.get_context("fork").Pool(2) as pool:
+        print(pool.map(work, range(4)))
+`
+	out, stderr := runPythonTraceScript(t, script, "LOOM_TRACE_ID=trace-123")
+
+	assert.Contains(t, out, "[0, 1, 2, 3]")
+	workers := 0
+	for _, line := range traceLines(stderr) {
+		if strings.Contains(line, `"name":"work"`) {
+			workers++
+		}
+	}
+	assert.Equal(t, 4, workers, "every worker span should be exported: %s", stderr)
+}
+
+// TestPythonTraceLibraryPartialLines tests that buffered spans are never
+// written into the middle of a partial application stderr line (requires
+// python3).
+func TestPythonTraceLibraryPartialLines(t *testing.T) {
+	script := `
+import sys, time
+from loom_trace import tracer, trace_span
+
+with trace_span("outer"):
+    with trace_span("inner"):
+        pass
+    sys.stderr.write("progress: 10%")
+    time.sleep(0.3)
+    sys.stderr.write(" done\n")
+`
+	_, stderr := runPythonTraceScript(t, script, "LOOM_TRACE_ID=trace-123")
+
+	assert.Contains(t, stderr, "progress: 10% done\n")
+	assert.Len(t, traceLines(stderr), 2, "unexpected stderr: %s", stderr)
+}
+
+// TestPythonTraceLibraryNoopWithoutTraceID tests that without LOOM_TRACE_ID
+// the library falls back to the no-op tracer and writes nothing to stderr
+// (requires python3).
+func TestPythonTraceLibraryNoopWithoutTraceID(t *testing.T) {
+	script := `
+from loom_trace import tracer, trace_span, trace_function
+
+with trace_span("query_database", query_type="SELECT") as span:
+    span.attributes["rows"] = 42
+span = tracer.start_span("manual", {"k": "v"})
+tracer.end_span(span, status="error")
+tracer.end_span(tracer.precompile_span("precompiled", ("k",))("v"))
+trace_function("decorated")(lambda: None)()
+tracer.flush()
+
+assert not span.attributes, span.attributes
+print(type(tracer).__name__, repr(tracer.trace_id), tracer.tenant_id)
+`
+	out, stderr := runPythonTraceScript(t, script,
+		"LOOM_TRACE_ID=",
+		"LOOM_TRACE_BAGGAGE=tenant_id=acme",
+	)
+
+	assert.Equal(t, "NoopTracer '' acme\n", out)
+	assert.Empty(t, stderr, "no-op tracer should not write to stderr")
+}
+
 // TestGetNodeTraceLibrary tests that the Node.js trace library is embedded correctly.
 func TestGetNodeTraceLibrary(t *testing.T) {
 	lib := GetNodeTraceLibrary()
@@ -91,9 +294,10 @@ func TestPythonTraceLibraryLineCount(t *testing.T) {
 	lib := GetPythonTraceLibrary()
 	lines := strings.Count(lib, "\n")
 
-	// Python library should be ~275-285 lines (after HAWK_ENDPOINT removal)
-	assert.Greater(t, lines, 250, "Python library should have >250 lines")
-	assert.Less(t, lines, 300, "Python library should have <300 lines")
+	// Python library should be ~690 lines (after batched export, NoopTracer
+	// and precompiled span templates)
+	assert.Greater(t, lines, 550, "Python library should have >550 lines")
+	assert.Less(t, lines, 750, "Python library should have <750 lines")
 }
 
 // TestNodeTraceLibraryLineCount tests approximate line count.